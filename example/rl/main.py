@@ -1,11 +1,14 @@
-import random
+import asyncio
+import logging
 import signal
 import threading
 from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+
 from example.rl.my_bot import MyBotTrainer, TRAINING_PLAYER_NUMBER
 from src.lugo4py import lugo
-from src.lugo4py.client import LugoClient
+from src.lugo4py.client import LugoClient, new_shared_channel
 from src.lugo4py.mapper import Mapper
 from src.lugo4py.rl.gym import Gym
 from src.lugo4py.rl.remote_control import RemoteControl
@@ -19,13 +22,19 @@ steps_per_iteration = 600
 grpc_address = "localhost:5000"
 grpc_insecure = True
 
-stop = threading.Event()
+# created by main() on its own event loop; the training function runs on a gym thread, so it uses training_over()
+stop = None
+main_loop = None
+
+
+def training_over():
+    main_loop.call_soon_threadsafe(stop.set)
 
 
 def my_training_function(training_ctrl: TrainingController, stop_event: threading.Event):
     print("Let's train")
 
-    possible_actions = [
+    possible_actions = (
         DIRECTION.FORWARD,
         DIRECTION.BACKWARD,
         DIRECTION.LEFT,
@@ -34,25 +43,27 @@ def my_training_function(training_ctrl: TrainingController, stop_event: threadin
         DIRECTION.BACKWARD_RIGHT,
         DIRECTION.FORWARD_RIGHT,
         DIRECTION.FORWARD_LEFT,
-    ]
-    scores = []
+    )
+    num_actions = len(possible_actions)
+    rng = np.random.default_rng()
+    scores = [0.0] * train_iterations
     for i in range(train_iterations):
         try:
-            scores.append(0)
             training_ctrl.set_environment({"iteration": i})
 
+            # draw the random actions of the whole iteration at once
+            action_idx = rng.integers(0, num_actions, size=steps_per_iteration)
             for j in range(steps_per_iteration):
                 if stop_event.is_set():
                     training_ctrl.stop()
-                    stop.set()
+                    training_over()
                     print("trainning stopped")
                     return
 
                 _ = training_ctrl.get_state()
 
                 # The sensors would feed our training model, which would return the next action
-                action = possible_actions[random.randint(
-                    0, len(possible_actions) - 1)]
+                action = possible_actions[action_idx[j]]
 
                 # Then we pass the action to our update method
                 result = training_ctrl.update(action)
@@ -68,10 +79,14 @@ def my_training_function(training_ctrl: TrainingController, stop_event: threadin
 
     training_ctrl.stop()
     print("Training is over, scores:", scores)
-    stop.set()
+    training_over()
 
 
-if __name__ == "__main__":
+async def main():
+    global stop, main_loop
+    main_loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+
     team_side = lugo.TeamSide.HOME
     print('main: Training bot team side = ', team_side)
     # The map will help us see the field in quadrants (called regions) instead of working with coordinates
@@ -81,6 +96,9 @@ if __name__ == "__main__":
     # Our bot strategy defines our bot initial position based on its number
     initial_region = mapper.get_region(5, 4)
 
+    # All players (the training bot and the zombies) multiplex their streams over a single connection
+    channel = new_shared_channel(grpc_address, grpc_insecure)
+
     # Now we can create the bot. We will use a shortcut to create the client from the config, but we could use the
     # client constructor as well
     lugo_client = LugoClient(
@@ -89,7 +107,8 @@ if __name__ == "__main__":
         "",
         team_side,
         TRAINING_PLAYER_NUMBER,
-        initial_region.get_center()
+        initial_region.get_center(),
+        channel=channel,
     )
     # The RemoteControl is a gRPC client that will connect to the Game Server and change the element positions
     rc = RemoteControl()
@@ -101,18 +120,23 @@ if __name__ == "__main__":
     # Now we can create the Gym, which will control all async work and allow us to focus on the learning part
     gym = Gym(gym_executor, rc, bot, my_training_function, {"debugging_log": False})
 
-    players_executor = ThreadPoolExecutor(22)
-    gym.with_zombie_players(grpc_address).start(lugo_client, players_executor)
-
+    # the zombie players run as tasks on the client event loop, so they do not need their own threads
+    gym.with_zombie_players(grpc_address, channel).start(lugo_client)
 
-    def signal_handler(_, __):
+    def on_interrupt():
         print("Stop requested\n")
-        lugo_client.stop()
-        gym.stop()
-        players_executor.shutdown(wait=True)
-        gym_executor.shutdown(wait=True)
+        stop.set()
+
+    # the signal only wakes up the loop, the shutdown below runs outside the signal handler
+    main_loop.add_signal_handler(signal.SIGINT, on_interrupt)
 
+    await stop.wait()
+    lugo_client.stop()
+    gym.stop()
+    gym_executor.shutdown(wait=False, cancel_futures=True)
 
-    signal.signal(signal.SIGINT, signal_handler)
 
-    stop.wait()
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+    asyncio.run(main())
@@ -1,3 +1,4 @@
+import logging
 import os
 import signal
 import sys
@@ -26,6 +27,8 @@ PLAYER_POSITIONS = {
 }
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
     # Set necessary env variables for testing
     if False:
         os.environ['BOT_TEAM'] = 'HOME'
@@ -0,0 +1,9 @@
+import logging
+
+from google.protobuf.internal import api_implementation
+
+# every bot parses a game snapshot per turn, and the pure python protobuf runtime is by far the slowest way to do it
+if api_implementation.Type() == "python":
+    logging.getLogger("lugo4py").warning(
+        "protobuf is using the pure python implementation, the bots will be slow - install protobuf>=4.21 wheels "
+        "to get the upb implementation")
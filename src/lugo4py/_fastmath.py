@@ -0,0 +1,27 @@
+from math import sqrt
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional (pip install lugo4py[fast]), without it the plain python functions are used
+    def njit(*_, **__):
+        def decorator(fn):
+            return fn
+
+        return decorator
+
+
+# move_max_speed returns the direction (scaled to 100, as geo.normalize does) and the speed of a move order from the
+# origin point to the target point. When both points are the same, the player is just stopped facing north.
+@njit(cache=True, fastmath=True)
+def move_max_speed(px, py, tx, ty, max_speed):
+    dx = tx - px
+    dy = ty - py
+    d = sqrt(dx * dx + dy * dy)
+    if d == 0:
+        return 0.0, 100.0, 0.0
+    return dx / d * 100.0, dy / d * 100.0, max_speed
+
+
+# compiling on the first turn would make the bot miss it, so we pay that cost at import time
+move_max_speed(0.0, 0.0, 1.0, 1.0, 1.0)
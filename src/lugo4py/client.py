@@ -1,8 +1,9 @@
+import asyncio
+import functools
 import grpc
-import time
-from concurrent.futures import ThreadPoolExecutor
-import traceback
-from typing import Callable, Iterator
+import logging
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Optional
 
 from . import lugo
 
@@ -16,14 +17,58 @@ import threading
 
 PROTOCOL_VERSION = "1.0.0"
 
+logger = logging.getLogger("lugo4py")
+
+# When the processor runs on the event loop (no executor), the OrderSet passed to it is reused by the client on the next
+# turn, so it must not keep a reference to it (or to the one it returns) across turns. Processors running on an
+# executor get a new OrderSet every turn.
 RawTurnProcessor = Callable[[lugo.OrderSet, lugo.GameSnapshot], lugo.OrderSet]
 
+# the full name of the Game.SendOrders method, used to send already serialized order sets
+SEND_ORDERS_METHOD = "/lugo.Game/SendOrders"
+
+# deadline (seconds) for each SendOrders call
+SEND_ORDERS_TIMEOUT = 5.0
+
+# all clients started through the sync API share this loop, so N bots cost one thread instead of N
+_shared_loop = None
+_shared_loop_lock = threading.Lock()
+
+
+def get_shared_loop() -> asyncio.AbstractEventLoop:
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            _shared_loop = asyncio.new_event_loop()
+            threading.Thread(target=_shared_loop.run_forever, name="lugo4py-loop", daemon=True).start()
+    return _shared_loop
+
+
+def new_shared_channel(server_add: str, grpc_insecure: bool = True, options=None,
+                       compression: grpc.Compression = grpc.Compression.NoCompression) -> grpc.aio.Channel:
+    # aio channels are bound to the loop they are created on, so it must be built on the shared loop to be used by
+    # clients started through the sync API
+    async def create() -> grpc.aio.Channel:
+        if grpc_insecure:
+            return grpc.aio.insecure_channel(server_add, options=options, compression=compression)
+        return grpc.aio.secure_channel(server_add, grpc.ssl_channel_credentials(), options=options,
+                                       compression=compression)
+
+    return asyncio.run_coroutine_threadsafe(create(), get_shared_loop()).result()
+
 
 # reference https://chromium.googlesource.com/external/github.com/grpc/grpc/+/master/examples/python/async_streaming/client.py
 class LugoClient(server_grpc.GameServicer):
 
-    def __init__(self, server_add, grpc_insecure, token, teamSide, number, init_position):
+    def __init__(self, server_add, grpc_insecure, token, teamSide, number, init_position,
+                 channel: Optional[grpc.aio.Channel] = None,
+                 compression: grpc.Compression = grpc.Compression.NoCompression):
         self._client = None
+        # snapshots and orders are small, compressing them only costs CPU unless the server is far away
+        self.compression = compression
+        self._send_orders = None
+        self._orders_scratch = server_pb2.OrderSet()
+        self.channel = channel
         self.getting_ready_handler = lambda snapshot: None
         self.callback = Callable[[lugo.GameSnapshot], lugo.OrderSet]
         self.serverAdd = server_add + "?t=" + str(teamSide) + "-" + str(number)
@@ -31,6 +76,8 @@ class LugoClient(server_grpc.GameServicer):
         self.token = token
         self.teamSide = teamSide
         self.number = number
+        self.is_goalkeeper = number == 1
+        self._name = f"{'HOME' if teamSide == 0 else 'AWAY'}-{number}"
         self.init_position = init_position
         self._play_finished = threading.Event()
         self._play_routine = None
@@ -39,7 +86,7 @@ class LugoClient(server_grpc.GameServicer):
         self._client = client
 
     def get_name(self):
-        return f"{'HOME' if self.teamSide == 0 else 'AWAY'}-{self.number}"
+        return self._name
 
     def set_initial_position(self, initial_position: lugo.Point):
         self.init_position = initial_position
@@ -50,50 +97,76 @@ class LugoClient(server_grpc.GameServicer):
     def set_ready_handler(self, new_ready_handler):
         self.getting_ready_handler = new_ready_handler
 
-    def play(self, executor: ThreadPoolExecutor, callback: Callable[[lugo.GameSnapshot], lugo.OrderSet],
+    def play(self, executor: Optional[Executor], callback: Callable[[lugo.GameSnapshot], lugo.OrderSet],
              on_join: Callable[[], None]) -> threading.Event:
         self.callback = callback
         log_with_time(f"{self.get_name()} Starting to play")
-        return self._bot_start(executor, callback, on_join)
+        self._run_on_shared_loop(self._bot_start(executor, callback, on_join))
+        return self._play_finished
+
+    async def play_async(self, callback: Callable[[lugo.GameSnapshot], lugo.OrderSet],
+                         on_join: Callable[[], None], executor: Optional[Executor] = None) -> asyncio.Task:
+        self.callback = callback
+        log_with_time(f"{self.get_name()} Starting to play")
+        return await self._bot_start(executor, callback, on_join)
 
-    def play_as_bot(self, executor: ThreadPoolExecutor, bot: Bot, on_join: Callable[[], None]) -> threading.Event:
+    def play_as_bot(self, executor: Optional[Executor], bot: Bot, on_join: Callable[[], None]) -> threading.Event:
         self.set_ready_handler(bot.getting_ready)
         log_with_time(f"{self.get_name()} Playing as bot")
+        self._run_on_shared_loop(self._bot_start(executor, self._bot_processor(bot), on_join))
+        return self._play_finished
+
+    async def play_as_bot_async(self, bot: Bot, on_join: Callable[[], None],
+                                executor: Optional[Executor] = None) -> asyncio.Task:
+        self.set_ready_handler(bot.getting_ready)
+        log_with_time(f"{self.get_name()} Playing as bot")
+        return await self._bot_start(executor, self._bot_processor(bot), on_join)
+
+    def _bot_processor(self, bot: Bot) -> RawTurnProcessor:
+        if self.is_goalkeeper:
+            def processor(orders: lugo.OrderSet, snapshot: lugo.GameSnapshot) -> lugo.OrderSet:
+                return bot.as_goalkeeper(orders, snapshot, define_state(snapshot, self.number, self.teamSide))
+
+            return processor
+
+        state_handlers = {
+            PLAYER_STATE.DISPUTING_THE_BALL: bot.on_disputing,
+            PLAYER_STATE.DEFENDING: bot.on_defending,
+            PLAYER_STATE.SUPPORTING: bot.on_supporting,
+            PLAYER_STATE.HOLDING_THE_BALL: bot.on_holding,
+        }
 
         def processor(orders: lugo.OrderSet, snapshot: lugo.GameSnapshot) -> lugo.OrderSet:
-            player_state = define_state(
-                snapshot, self.number, self.teamSide)
-            if self.number == 1:
-                orders = bot.as_goalkeeper(
-                    orders, snapshot, player_state)
-            else:
-                if player_state == PLAYER_STATE.DISPUTING_THE_BALL:
-                    orders = bot.on_disputing(orders, snapshot)
-                elif player_state == PLAYER_STATE.DEFENDING:
-                    orders = bot.on_defending(orders, snapshot)
-                elif player_state == PLAYER_STATE.SUPPORTING:
-                    orders = bot.on_supporting(orders, snapshot)
-                elif player_state == PLAYER_STATE.HOLDING_THE_BALL:
-                    orders = bot.on_holding(orders, snapshot)
-            return orders
-
-        return self._bot_start(executor, processor, on_join)
-
-    def _bot_start(self, executor: ThreadPoolExecutor, processor: RawTurnProcessor,
-                   on_join: Callable[[], None]) -> threading.Event:
+            return state_handlers[define_state(snapshot, self.number, self.teamSide)](orders, snapshot)
+
+        return processor
+
+    @staticmethod
+    def _run_on_shared_loop(coro):
+        # sync facade: blocks the caller until the coroutine is done on the shared loop
+        return asyncio.run_coroutine_threadsafe(coro, get_shared_loop()).result()
+
+    async def _bot_start(self, executor: Optional[Executor], processor: RawTurnProcessor,
+                         on_join: Callable[[], None]) -> asyncio.Task:
         log_with_time(f"{self.get_name()} Starting bot {self.teamSide}-{self.number}")
-        if self.grpc_insecure:
-            channel = grpc.insecure_channel(self.serverAdd)
+        if self.channel is not None:
+            channel = self.channel
+        elif self.grpc_insecure:
+            channel = grpc.aio.insecure_channel(self.serverAdd, compression=self.compression)
         else:
-            channel = grpc.secure_channel(
-                self.serverAdd, grpc.ssl_channel_credentials())
+            channel = grpc.aio.secure_channel(self.serverAdd, grpc.ssl_channel_credentials(),
+                                              compression=self.compression)
         try:
-            grpc.channel_ready_future(channel).result(timeout=5)
-        except grpc.FutureTimeoutError:
+            await asyncio.wait_for(channel.channel_ready(), timeout=5)
+        except asyncio.TimeoutError:
             raise Exception(f"timed out waiting to connect to the game server ({self.serverAdd})")
 
         self.channel = channel
         self._client = server_grpc.GameStub(channel)
+        # orders are sent already serialized (see _response_watcher), so this callable takes bytes
+        self._send_orders = functools.partial(
+            channel.unary_unary(SEND_ORDERS_METHOD, response_deserializer=server_pb2.OrderResponse.FromString),
+            compression=self.compression)
 
         join_request = server_pb2.JoinRequest(
             token=self.token,
@@ -102,58 +175,94 @@ class LugoClient(server_grpc.GameServicer):
             init_position=self.init_position,
         )
 
-        response_iterator = self._client.JoinATeam(join_request)
-        on_join()
-        self._play_routine = executor.submit(self._response_watcher, response_iterator, processor)
-        return self._play_finished
+        response_iterator = self._client.JoinATeam(join_request, compression=self.compression)
+        # on_join may block (e.g. it may connect other bots through the sync API), so it must not run on the loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, on_join)
+        self._play_routine = loop.create_task(self._response_watcher(response_iterator, processor, executor))
+        return self._play_routine
 
     def stop(self):
         log_with_time(
             f"{self.get_name()} stopping bot - you may need to kill the process if there is no messages coming from "
             f"the server")
-        self._play_routine.cancel()
+        if self._play_routine is not None:
+            self._play_routine.get_loop().call_soon_threadsafe(self._play_routine.cancel)
         self._play_finished.set()
 
     def wait(self):
         self._play_finished.wait(timeout=None)
 
-    def _response_watcher(
+    @staticmethod
+    async def _run_handler(executor: Optional[Executor], handler, *args):
+        # handlers are user code and may block; without an executor they run straight on the loop
+        if executor is None:
+            return handler(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, handler, *args)
+
+    async def _response_watcher(
             self,
-            response_iterator: Iterator[lugo.GameSnapshot],
-            # snapshot,
-            processor: RawTurnProcessor) -> None:
+            response_iterator: AsyncIterator[lugo.GameSnapshot],
+            processor: RawTurnProcessor,
+            executor: Optional[Executor] = None) -> None:
+        # the loop below runs once per turn for every bot, so everything it touches is bound to locals up front
+        name = self._name
+        finished = self._play_finished
+        send_orders = self._send_orders
+        orders_scratch = self._orders_scratch
+        run_handler = self._run_handler
+        log_enabled_for = logger.isEnabledFor
+        OVER = lugo.State.OVER
+
+        async def handle_listening(snapshot: lugo.GameSnapshot) -> None:
+            if executor is None:
+                orders = orders_scratch
+                orders.Clear()
+            else:
+                # a processor running on another thread may still hold the previous order set (e.g. TrainingCrl keeps it
+                # for the training thread), so it gets a fresh one instead of the reused one
+                orders = server_pb2.OrderSet()
+            orders.turn = snapshot.turn
+            try:
+                orders = await run_handler(executor, processor, orders, snapshot)
+            except Exception as e:
+                logger.exception("%s bot processor error: %s", name, e)
+
+            if orders:
+                try:
+                    await send_orders(orders.SerializePartialToString(), timeout=SEND_ORDERS_TIMEOUT)
+                except grpc.RpcError as e:
+                    logger.error("%s [turn #%s] failed to send orders: %s", name, snapshot.turn, e.details())
+            elif log_enabled_for(logging.DEBUG):
+                logger.debug("%s [turn #%s] bot %s-%s did not return orders",
+                             name, snapshot.turn, self.teamSide, self.number)
+
+        async def handle_getting_ready(snapshot: lugo.GameSnapshot) -> None:
+            await run_handler(executor, self.getting_ready_handler, snapshot)
+
+        state_handlers = {
+            lugo.State.LISTENING: handle_listening,
+            lugo.State.GET_READY: handle_getting_ready,
+        }
+
         try:
-            for snapshot in response_iterator:
-                if snapshot.state == lugo.State.OVER:
-                    log_with_time(
-                        f"{self.get_name()} All done! {lugo.State.OVER}")
+            async for snapshot in response_iterator:
+                state = snapshot.state
+                if state == OVER:
+                    log_with_time(f"{name} All done! {OVER}")
                     break
-                elif self._play_finished.is_set():
+                elif finished.is_set():
                     break
-                elif snapshot.state == lugo.State.LISTENING:
-                    orders = server_pb2.OrderSet()
-                    orders.turn = snapshot.turn
-                    try:
-                        orders = processor(orders, snapshot)
-                    except Exception as e:
-                        traceback.print_exc()
-                        log_with_time(f"{self.get_name()}bot processor error: {e}")
-
-                    if orders:
-                        self._client.SendOrders(orders)
-                    else:
-                        log_with_time(
-                            f"{self.get_name()} [turn #{snapshot.turn}] bot {self.teamSide}-{self.number} did not return orders")
-                elif snapshot.state == lugo.State.GET_READY:
-                    self.getting_ready_handler(snapshot)
+                handler = state_handlers.get(state)
+                if handler is not None:
+                    await handler(snapshot)
 
             self._play_finished.set()
         except grpc.RpcError as e:
             if grpc.StatusCode.INVALID_ARGUMENT == e.code():
-                log_with_time(f"{self.get_name()} did not connect {e.details()}")
+                logger.error("%s did not connect %s", self._name, e.details())
         except Exception as e:
-            log_with_time(f"{self.get_name()} internal error processing turn: {e}")
-            traceback.print_exc()
+            logger.exception("%s internal error processing turn: %s", self._name, e)
 
 
 def NewClientFromConfig(config: EnvVarLoader, initialPosition: lugo.Point) -> LugoClient:
@@ -165,9 +274,10 @@ def NewClientFromConfig(config: EnvVarLoader, initialPosition: lugo.Point) -> Lu
         config.get_bot_team_side(),
         config.get_bot_number(),
         initialPosition,
+        compression=config.get_grpc_compression(),
     )
 
 
+# the timestamp is added by the logging formatter, see logging.basicConfig in the examples
 def log_with_time(msg):
-    current_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-    print(f"{current_time}: {msg}")
+    logger.info("%s", msg)
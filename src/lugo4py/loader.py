@@ -1,3 +1,5 @@
+import grpc
+
 from .protos import server_pb2_grpc
 from .protos import server_pb2
 
@@ -5,6 +7,12 @@ from . import specs
 
 import os
 
+GRPC_COMPRESSION = {
+    'none': grpc.Compression.NoCompression,
+    'deflate': grpc.Compression.Deflate,
+    'gzip': grpc.Compression.Gzip,
+}
+
 
 class EnvVarLoader:
 
@@ -14,6 +22,7 @@ class EnvVarLoader:
         self._botTeamSide = None
         self._botNumber = None
         self._botToken = ""
+        self._grpcCompression = grpc.Compression.NoCompression
 
         if "BOT_TEAM" not in os.environ:
             raise SystemError("missing BOT_TEAM env value")
@@ -25,6 +34,12 @@ class EnvVarLoader:
         self._grpcUrl = os.environ.get('BOT_GRPC_URL', 'localhost:5000')
         self._grpcInsecure = bool(os.environ.get('BOT_GRPC_INSECURE', 'false'))
 
+        # compression is only worth it when the game server is far away (e.g. in another datacenter)
+        compression = os.environ.get('BOT_GRPC_COMPRESSION', 'none').lower()
+        if compression not in GRPC_COMPRESSION:
+            raise SystemError(f'invalid grpc compression {compression}, must be one of {", ".join(GRPC_COMPRESSION)}')
+        self._grpcCompression = GRPC_COMPRESSION[compression]
+
         # defining bot side
         self._botTeamSide = server_pb2.Team.Side.HOME if os.environ[
                                                              "BOT_TEAM"].upper() == 'HOME' else server_pb2.Team.Side.AWAY
@@ -41,6 +56,9 @@ class EnvVarLoader:
     def get_grpc_insecure(self):
         return self._grpcInsecure
 
+    def get_grpc_compression(self):
+        return self._grpcCompression
+
     def get_bot_team_side(self):
         return self._botTeamSide
 
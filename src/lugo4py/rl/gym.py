@@ -1,10 +1,13 @@
 import time
+from typing import Optional
+
+import grpc
 
 from .training_controller import TrainingCrl
-from .helper_bots import newChaserHelperPlayer, newZombieHelperPlayer
+from .helper_bots import newChaserHelperPlayerAsync, newZombieHelperPlayerAsync
 from .remote_control import RemoteControl
 from .interfaces import BotTrainer, TrainingFunction
-from ..client import LugoClient
+from ..client import LugoClient, get_shared_loop
 from ..protos.server_pb2 import Team, OrderSet
 import asyncio
 from threading import Timer
@@ -27,6 +30,7 @@ class Gym:
             options = {"debugging_log": False}
 
         self.remoteControl = remote_control
+        self.executor = executor
         self.debugging_log = options["debugging_log"]
         self.trainingCrl = TrainingCrl(executor,
                                        remote_control, trainer, trainingFunction)
@@ -34,9 +38,14 @@ class Gym:
         self.trainingCrl.logger = self._debug
         self.gameServerAddress = None
         self.helperPlayers = None
+        self.sharedChannel = None
         self.players = []
 
-    def start(self, lugo_client: LugoClient, executor: ThreadPoolExecutor):
+    def start(self, lugo_client: LugoClient, executor: Optional[ThreadPoolExecutor] = None):
+        # the helper players run as tasks on the client event loop, so the executor only hosts the training bot
+        # handlers and the remote control calls - there is no need to size it by the number of players
+        if executor is None:
+            executor = self.executor
         hasStarted = False
 
         def play_callback(orderSet, snapshot):
@@ -55,7 +64,7 @@ class Gym:
             self._debug('The main bot is connected!! Starting to connect the zombies')
             time.sleep(0.2)
             if self.gameServerAddress:
-                self.players = self.helperPlayers(self.gameServerAddress, executor)
+                self.players = self.helperPlayers(self.gameServerAddress, self.sharedChannel)
             self._debug('helpers are done')
             trigger_listening()
 
@@ -67,21 +76,24 @@ class Gym:
         for player in self.players:
             player.stop()
 
-    def with_zombie_players(self, game_server_address):
+    def with_zombie_players(self, game_server_address, shared_channel: Optional[grpc.aio.Channel] = None):
         self._debug('Entering with_zombie_players\n')
         self.gameServerAddress = game_server_address
+        self.sharedChannel = shared_channel
         self.helperPlayers = create_helper_players
         return self
 
-    def withChasersPlayers(self, game_server_address):
+    def withChasersPlayers(self, game_server_address, shared_channel: Optional[grpc.aio.Channel] = None):
         self.gameServerAddress = game_server_address
+        self.sharedChannel = shared_channel
 
-        def helper_players(game_server_address):
-            for i in range(1, 12):
-                newChaserHelperPlayer(Team.Side.HOME, i, game_server_address)
-                newChaserHelperPlayer(Team.Side.AWAY, i, game_server_address)
+        def helper_players(game_server_address, channel):
+            return _connect_helper_players([
+                newChaserHelperPlayerAsync(side, i, game_server_address, channel)
+                for i in range(1, 12) for side in (Team.Side.HOME, Team.Side.AWAY)
+            ])
 
-        self.helperPlayers = helper_players(game_server_address)
+        self.helperPlayers = helper_players
         return self
 
     def _debug(self, message: str):
@@ -90,11 +102,25 @@ class Gym:
             print(f"[Debugger {t}] {message}")
 
 
-def create_helper_players(gameServerAddress: str, executor: ThreadPoolExecutor):
-    children = []
-    for i in range(0, 11):
-        time.sleep(0.01)
-        children.append(newZombieHelperPlayer(Team.Side.HOME, i + 1, gameServerAddress, executor))
-        time.sleep(0.01)
-        children.append(newZombieHelperPlayer(Team.Side.AWAY, i + 1, gameServerAddress, executor))
-    return children
+def create_helper_players(gameServerAddress: str, shared_channel: Optional[grpc.aio.Channel] = None):
+    # the zombies' turn handlers are trivial, so they run straight on the shared event loop
+    return _connect_helper_players([
+        newZombieHelperPlayerAsync(side, i, gameServerAddress, shared_channel=shared_channel)
+        for i in range(1, 12) for side in (Team.Side.HOME, Team.Side.AWAY)
+    ])
+
+
+def _connect_helper_players(connections) -> list:
+    # all helpers connect at the same time, so the startup takes as long as the slowest connection, not their sum
+    # if any of them fails, the ones that did connect are stopped, since nothing else would be able to reach them
+    async def connect_all():
+        results = await asyncio.gather(*connections, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            for result in results:
+                if isinstance(result, LugoClient):
+                    result.stop()
+            raise errors[0]
+        return list(results)
+
+    return asyncio.run_coroutine_threadsafe(connect_all(), get_shared_loop()).result()
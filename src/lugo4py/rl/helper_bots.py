@@ -1,4 +1,7 @@
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor
+from typing import Optional
+
+import grpc
 
 from ..client import LugoClient
 from ..mapper import Mapper
@@ -18,57 +21,109 @@ PLAYER_POSITIONS = {
     11: {'Col': 10, 'Row': 1},
 }
 
+# the initial position of every helper player, computed once instead of building a Mapper per player
+_mappers = {side: Mapper(22, 5, side) for side in (0, 1)}
+_INITIAL_CENTERS = {
+    (side, number): mapper.get_region(position['Col'], position['Row']).get_center()
+    for side, mapper in _mappers.items()
+    for number, position in PLAYER_POSITIONS.items()
+}
+
 
-def chaser_turn_handler(team_side, player_number, order_set, snapshot):
+def chaser_turn_handler(team_side, player_number, name_prefix, order_set, snapshot):
     reader = GameSnapshotReader(snapshot, team_side)
-    order_set.addOrders(reader.makeOrderCatch())
-    me = reader.get_player(team_side, player_number)
-    if not me:
+    catch, move, me = reader.plan_chase(team_side, player_number)
+    if me is None:
         raise ValueError("did not find myself in the game")
 
-    order_set.addOrders(reader.make_order_move_max_speed(
-        me.getPosition(), snapshot.getBall().getPosition()))
-    order_set.setDebugMessage(
-        f"{'HOME' if team_side == 0 else 'AWAY'}-{player_number} #{snapshot.turn} - chasing ball")
+    order_set.orders.extend([catch, move])
+    order_set.debug_message = f"{name_prefix} #{snapshot.turn} - chasing ball"
     return order_set
 
 
-# @background
-def newZombieHelperPlayer(team_side, player_number, game_server_address, executor: ThreadPoolExecutor):
+def _new_zombie_turn_handler(team_side, player_number):
+    name_prefix = f"{'HOME' if team_side == 0 else 'AWAY'}-{player_number}"
+    debug_message_prefix = f"{name_prefix} #"
+
     def zombie_turn_handler(order_set, snapshot):
-        # print(f"Zombiw {'HOME' if team_side == 0 else 'AWAY'}-{player_number} got new snapthos")
-        order_set.debug_message = f"{'HOME' if team_side == 0 else 'AWAY'}-{player_number} #{snapshot.turn}"
+        order_set.debug_message = debug_message_prefix + str(snapshot.turn)
         return order_set
 
-    #
-    return newCustomHelperPlayer(team_side, player_number, game_server_address, zombie_turn_handler, executor)
+    return zombie_turn_handler
+
+
+def _new_chaser_turn_handler(team_side, player_number):
+    name_prefix = f"{'HOME' if team_side == 0 else 'AWAY'}-{player_number}"
 
+    def turn_handler(order_set, snapshot):
+        return chaser_turn_handler(team_side, player_number, name_prefix, order_set, snapshot)
 
-def newChaserHelperPlayer(team_side, player_number, game_server_address):
-    return newCustomHelperPlayer(team_side, player_number, game_server_address, chaser_turn_handler)
+    return turn_handler
+
+
+def _new_helper_client(team_side, player_number, game_server_address,
+                       shared_channel: Optional[grpc.aio.Channel]) -> LugoClient:
+    return LugoClient(
+        game_server_address,
+        True,
+        "",
+        team_side,
+        player_number,
+        _INITIAL_CENTERS[(team_side, player_number)],
+        channel=shared_channel,
+    )
+
+
+def _muted():
+    pass
+
+
+# @background
+def newZombieHelperPlayer(team_side, player_number, game_server_address, executor: Optional[Executor] = None,
+                          shared_channel: Optional[grpc.aio.Channel] = None):
+    return newCustomHelperPlayer(team_side, player_number, game_server_address,
+                                 _new_zombie_turn_handler(team_side, player_number), executor, shared_channel)
+
+
+async def newZombieHelperPlayerAsync(team_side, player_number, game_server_address,
+                                     executor: Optional[Executor] = None,
+                                     shared_channel: Optional[grpc.aio.Channel] = None):
+    return await newCustomHelperPlayerAsync(team_side, player_number, game_server_address,
+                                            _new_zombie_turn_handler(team_side, player_number), executor,
+                                            shared_channel)
+
+
+def newChaserHelperPlayer(team_side, player_number, game_server_address,
+                          shared_channel: Optional[grpc.aio.Channel] = None):
+    return newCustomHelperPlayer(team_side, player_number, game_server_address,
+                                 _new_chaser_turn_handler(team_side, player_number), shared_channel=shared_channel)
+
+
+async def newChaserHelperPlayerAsync(team_side, player_number, game_server_address,
+                                     shared_channel: Optional[grpc.aio.Channel] = None):
+    return await newCustomHelperPlayerAsync(team_side, player_number, game_server_address,
+                                            _new_chaser_turn_handler(team_side, player_number),
+                                            shared_channel=shared_channel)
 
 
 def newCustomHelperPlayer(team_side, player_number, game_server_address, turn_handler_function,
-                          executor: ThreadPoolExecutor):
+                          executor: Optional[Executor] = None, shared_channel: Optional[grpc.aio.Channel] = None):
+    lugo_client = _new_helper_client(team_side, player_number, game_server_address, shared_channel)
+    try:
+        lugo_client.play(executor, turn_handler_function, _muted)
+        return lugo_client
+    except Exception as e:
+        lugo_client.stop()
+        raise e
+
+
+# the async version lets many helpers wait for their connection at the same time (see asyncio.gather)
+async def newCustomHelperPlayerAsync(team_side, player_number, game_server_address, turn_handler_function,
+                                     executor: Optional[Executor] = None,
+                                     shared_channel: Optional[grpc.aio.Channel] = None):
+    lugo_client = _new_helper_client(team_side, player_number, game_server_address, shared_channel)
     try:
-        # print(f'Creating {team_side} and {player_number}\n')
-        initial_region = Mapper(22, 5, team_side).get_region(
-            PLAYER_POSITIONS[player_number]['Col'], PLAYER_POSITIONS[player_number]['Row'])
-
-        lugo_client = LugoClient(
-            game_server_address,
-            True,
-            "",
-            team_side,
-            player_number,
-            initial_region.get_center(),
-        )
-
-        def muted():
-            None
-
-        # print(f'Vai connectar {team_side} and {player_number}\n')
-        lugo_client.play(executor, turn_handler_function, muted)
+        await lugo_client.play_async(turn_handler_function, _muted, executor)
         return lugo_client
     except Exception as e:
         lugo_client.stop()
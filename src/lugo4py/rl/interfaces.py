@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Any
+from typing import Callable, Any, List
 
 from .. import lugo
 
@@ -35,6 +35,24 @@ class TrainingController(ABC):
     def update(self, action):
         pass
 
+    #
+    # Use this method to play several steps in a row when your model picks a chunk of actions at once. It returns the
+    # `{reward, done}` value of each step that was played: it stops early when a step is `done` or when the training is
+    # stopped, so the list may be shorter than the actions list.
+    # @param actions
+    # @returns {List[{reward: number, done: boolean}]}
+    #
+    def update_batch(self, actions: List[Any]) -> List[Any]:
+        results = []
+        for action in actions:
+            result = self.update(action)
+            if result is None:
+                break
+            results.append(result)
+            if result["done"]:
+                break
+        return results
+
     #
     # Stops the training
     #
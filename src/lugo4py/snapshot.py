@@ -1,6 +1,7 @@
 from . import geo, interface
 from . import orientation, lugo
 from . import specs
+from ._fastmath import move_max_speed
 from .goal import Goal
 from .protos import server_pb2
 from .protos.physics_pb2 import Point
@@ -204,6 +205,24 @@ class GameSnapshotReader:
         order.catch.SetInParent()
         return order
 
+    # plan_chase finds the player and builds both orders needed to chase the ball (catch and move to the ball at max
+    # speed) in a single pass, returning (catch_order, move_order, player). All of them are None if the player is not
+    # in the snapshot.
+    def plan_chase(self, side: server_pb2.Team.Side, number: int):
+        me = self.get_player(side, number)
+        if me is None:
+            return None, None, None
+
+        my_position = me.position
+        ball_position = self.snapshot.ball.position
+        direction_x, direction_y, speed = move_max_speed(my_position.x, my_position.y,
+                                                         ball_position.x, ball_position.y, specs.PLAYER_MAX_SPEED)
+        move = server_pb2.Order()
+        move.move.velocity.direction.x = direction_x
+        move.move.velocity.direction.y = direction_y
+        move.move.velocity.speed = speed
+        return self.makeOrderCatch(), move, me
+
 
 awayGoal = Goal(
     server_pb2.Team.Side.AWAY,